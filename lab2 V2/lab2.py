@@ -1,5 +1,7 @@
+import sys
 from enum import Enum
-from typing import Tuple
+from pathlib import Path
+from typing import Tuple, NamedTuple
 
 
 # === 1. Enum для цветов текста ===
@@ -20,40 +22,67 @@ class FontSize(Enum):
 
 
 # === 3. Загрузка псевдошрифта из файла ===
-def load_font_template(file_path: str) -> dict:
-    font = {}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+class FontTemplate(NamedTuple):
+    glyphs: dict      # символ -> кортеж строк одинаковой ширины
+    width: int
+    height: int
+    rendered: dict    # (символ, symbol, цвет) -> готовые строки, см. Printer._render_char
+
+
+# Разобранные шрифты: путь -> (время изменения файла, шаблон)
+_template_cache: dict[str, tuple[int, FontTemplate]] = {}
+
+
+def load_font_template(file_path: str) -> FontTemplate:
+    path = Path(file_path)
+    mtime = path.stat().st_mtime_ns
+    cached = _template_cache.get(file_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
 
+    font = {}
     current_char = None
     buffer = []
 
-    for line in lines:
-        if line.startswith('#'):
+    # Один проход: каждая строка обрезается ровно один раз.
+    # Комментарий - только '#' в первой позиции: строки символа могут начинаться с отступа и '#'
+    for raw in path.read_text(encoding='utf-8').splitlines():
+        if raw.startswith('#'):
+            continue
+        stripped = raw.strip()
+        if not stripped:
             continue
-        if line.strip().startswith('CHAR:'):
+        if stripped.startswith('CHAR:'):
             if current_char:
                 font[current_char] = buffer
-            current_char = line.strip().split(':')[1].strip()
+            current_char = stripped[5:].strip()
             buffer = []
-        elif line.strip():
-            buffer.append(line.rstrip('\n'))
+        else:
+            buffer.append(raw.rstrip())
 
     if current_char:
         font[current_char] = buffer
 
-    return font
+    # Выравниваем все символы до общей ширины и высоты шрифта
+    height = max((len(rows) for rows in font.values()), default=0)
+    width = max((len(row) for rows in font.values() for row in rows), default=0)
+    glyphs = {
+        char: tuple(row.ljust(width) for row in rows) + (' ' * width,) * (height - len(rows))
+        for char, rows in font.items()
+    }
+    template = FontTemplate(glyphs, width, height, {})
+    _template_cache[file_path] = (mtime, template)
+    return template
 
 
 # === 4. Класс Printer ===
 class Printer:
-    _font_cache = {}
+    _CURSOR_FMT = "\u001b[{};{}H"
 
     @staticmethod
-    def _get_font(font_size: FontSize) -> dict:
-        if font_size not in Printer._font_cache:
-            Printer._font_cache[font_size] = load_font_template(font_size.value)
-        return Printer._font_cache[font_size]
+    def _get_font(font_size: FontSize) -> FontTemplate:
+        # load_font_template сам кеширует шаблон и перечитывает файл только после его изменения
+        return load_font_template(font_size.value)
 
     def __init__(self, color: Color, position: Tuple[int, int], symbol: str = '*', font_size: FontSize = FontSize.BIG):
         self.color = color
@@ -68,7 +97,7 @@ class Printer:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._restore_cursor_position()
-        print(Color.RESET.value, end='')
+        sys.stdout.write(Color.RESET.value)
 
     @staticmethod
     def print(text: str, color: Color, position: Tuple[int, int], symbol: str = '*', font_size: FontSize = FontSize.BIG):
@@ -81,29 +110,43 @@ class Printer:
         Printer._print_big_text(text, self.color, self.symbol, self.font)
 
     @staticmethod
-    def _print_big_text(text: str, color: Color, symbol: str, font: dict):
-        height = max(len(font.get(char.upper(), [])) for char in text)
-
-        for row in range(height):
-            for char in text:
-                pattern = font.get(char.upper(), ['?'] * height)
-                if row < len(pattern):
-                    line = pattern[row].replace('*', symbol)
-                    print(f"{color.value}{line}{Color.RESET.value} ", end='')
-                else:
-                    print(' ' * len(pattern[0]), end=' ')
-            print()
+    def _render_char(font: FontTemplate, char: str, symbol: str, color_val: str, reset_val: str) -> list:
+        # Строки символа уже с подставленным symbol и цветом; кеш живёт в самом шаблоне,
+        # поэтому перезагруженный шрифт не получит строки старого
+        key = (char.upper(), symbol, color_val)
+        rendered = font.rendered.get(key)
+        if rendered is None:
+            pattern = font.glyphs.get(char.upper())
+            if pattern is None:
+                rendered = [f"{color_val}{'?'.ljust(font.width)}{reset_val} "] * font.height
+            else:
+                rendered = [f"{color_val}{line.replace('*', symbol)}{reset_val} " for line in pattern]
+            font.rendered[key] = rendered
+        return rendered
+
+    @staticmethod
+    def _print_big_text(text: str, color: Color, symbol: str, font: FontTemplate):
+        # Собираем весь баннер в буфер и выводим одним вызовом write
+        color_val = color.value
+        reset_val = Color.RESET.value
+        columns = [Printer._render_char(font, char, symbol, color_val, reset_val) for char in text]
+
+        out = []
+        append = out.append
+        for row in range(font.height):
+            append(''.join(column[row] for column in columns))
+            append('\n')
+        sys.stdout.write(''.join(out))
 
     @staticmethod
     def _move_cursor(position: Tuple[int, int]):
-        row, col = position
-        print(f"\u001b[{row};{col}H", end='')
+        sys.stdout.write(Printer._CURSOR_FMT.format(*position))
 
     def _save_cursor_position(self):
-        print("\u001b[s", end='')
+        sys.stdout.write("\u001b[s")
 
     def _restore_cursor_position(self):
-        print("\u001b[u", end='')
+        sys.stdout.write("\u001b[u")
 
 
 # === 5. Демонстрация ===
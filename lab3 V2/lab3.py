@@ -1,41 +1,101 @@
+import asyncio
 import socket
 import threading
 import time
+import traceback
 import re
+import struct
 import sys
-from typing import Protocol, List
+import weakref
+from typing import Protocol, List, Optional
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# google-re2 гарантирует линейное время поиска; без него используется стандартный re
+try:
+    import re2 as regex_engine
+except ImportError:
+    regex_engine = re
 
 # --- Протоколы и классы фильтров, обработчиков ---
+# Фильтры и обработчики объявляют __slots__: меньше памяти на экземпляр и быстрее
+# доступ к атрибутам. JIT-компиляция (Numba) здесь не используется: код работает
+# со строками, словарями, файлами и сокетами, а строковые операции в Numba
+# медленнее, чем в CPython, и f-строки не поддерживаются.
 
 class LogFilterProtocol(Protocol):
     def match(self, text: str) -> bool:
         ...
 
 class SimpleLogFilter:
+    __slots__ = ('pattern',)
     def __init__(self, pattern: str):
         self.pattern = pattern
     def match(self, text: str) -> bool:
-        try:
-            return self.pattern in text
-        except Exception as e:
-            print(f"SimpleLogFilter error: {e}", file=sys.stderr)
+        return self.pattern in text
+
+class MultiSubstringFilter:
+    """Проверяет несколько подстрок за один проход по тексту (Aho-Corasick).
+
+    mode='all' - текст должен содержать все подстроки, mode='any' - хотя бы одну.
+    Без пакета pyahocorasick подстроки проверяются по очереди через `in`.
+    """
+    __slots__ = ('patterns', 'mode', '_aho')
+    def __init__(self, patterns: List[str], mode: str = 'all'):
+        if mode not in ('all', 'any'):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.patterns = frozenset(patterns)
+        self.mode = mode
+        self._aho = None
+        if ahocorasick is not None and self.patterns:
+            self._aho = ahocorasick.Automaton()
+            for p in self.patterns:
+                self._aho.add_word(p, p)
+            self._aho.make_automaton()
+    def match(self, text: str) -> bool:
+        if self._aho is None:
+            check = all if self.mode == 'all' else any
+            return check(p in text for p in self.patterns)
+        if self.mode == 'any':
+            for _ in self._aho.iter(text):
+                return True
             return False
+        seen = set()
+        for _, p in self._aho.iter(text):
+            seen.add(p)
+            if len(seen) == len(self.patterns):
+                return True
+        return False
 
 class ReLogFilter:
+    __slots__ = ('regex',)
     def __init__(self, pattern: str):
         try:
-            self.regex = re.compile(pattern)
-        except re.error as e:
-            print(f"ReLogFilter init error: {e}", file=sys.stderr)
-            self.regex = None
+            self.regex = regex_engine.compile(pattern)
+        except regex_engine.error:
+            # RE2 не поддерживает обратные ссылки и lookaround - такие выражения
+            # компилируются стандартным re
+            try:
+                self.regex = re.compile(pattern)
+            except re.error as e:
+                print(f"ReLogFilter init error: {e}", file=sys.stderr)
+                self.regex = None
 
     def match(self, text: str) -> bool:
-        try:
-            if self.regex:
-                return bool(self.regex.search(text))
-        except Exception as e:
-            print(f"ReLogFilter error: {e}", file=sys.stderr)
-        return False
+        return self.regex is not None and self.regex.search(text) is not None
+
+class FusedReLogFilter:
+    """Несколько регулярных выражений, объединённых через lookahead в одно (AND)."""
+    __slots__ = ('regex',)
+    def __init__(self, patterns: List[str]):
+        # \A + [\s\S]*? - каждое выражение ищется от начала текста, сам текст не "съедается"
+        self.regex = re.compile(r'\A' + ''.join(f'(?=[\\s\\S]*?(?:{p}))' for p in patterns))
+
+    def match(self, text: str) -> bool:
+        return self.regex.search(text) is not None
 
 
 class LogHandlerProtocol(Protocol):
@@ -43,26 +103,64 @@ class LogHandlerProtocol(Protocol):
         ...
 
 class FileHandler:
+    __slots__ = ('filename', '_f', '_finalizer', '__weakref__')
     def __init__(self, filename: str):
         self.filename = filename
+        # Файл открыт на всё время жизни обработчика, buffering=1 сбрасывает буфер по '\n'
+        try:
+            self._f = open(filename, 'a', buffering=1, encoding='utf-8')
+        except Exception as e:
+            print(f"FileHandler init error: {e}", file=sys.stderr)
+            self._f = None
+        # finalize закроет файл при сборке обработчика или при выходе из программы,
+        # не удерживая сам обработчик (в отличие от atexit.register)
+        self._finalizer = weakref.finalize(self, self._f.close) if self._f is not None else None
     def handle(self, text: str) -> None:
         try:
-            with open(self.filename, 'a', encoding='utf-8') as f:
-                f.write(text + '\n')
+            self._f.write(text)
+            self._f.write('\n')
         except Exception as e:
             print(f"FileHandler error: {e}", file=sys.stderr)
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+            self._f = None
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 class SocketHandler:
+    __slots__ = ('host', 'port', '_sock')
     def __init__(self, host: str, port: int):
         self.host = host
         self.port = port
+        # Соединение создаётся при первом сообщении и переиспользуется
+        self._sock = None
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port))
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    def _send(self, data: bytes) -> None:
+        if self._sock is None:
+            self._connect()
+        # Каждое сообщение предваряется его длиной (4 байта, big-endian)
+        self._sock.sendall(struct.pack('>I', len(data)) + data)
     def handle(self, text: str) -> None:
+        data = text.encode('utf-8')
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.host, self.port))
-                s.sendall(text.encode('utf-8'))
+            try:
+                self._send(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # Сервер закрыл соединение - переподключаемся один раз
+                self.close()
+                self._send(data)
         except Exception as e:
+            self.close()
             print(f"SocketHandler error: {e}", file=sys.stderr)
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
 
 class ConsoleHandler:
     def handle(self, text: str) -> None:
@@ -72,11 +170,35 @@ class ConsoleHandler:
             print(f"ConsoleHandler error: {e}", file=sys.stderr)
 
 class SyslogHandler:
-    def __init__(self, ident: str = 'MyLogger'):
+    __slots__ = ('ident', '_prefix', '_sock')
+    def __init__(self, ident: str = 'MyLogger', address: Optional[str] = None):
         self.ident = ident
+        # Префикс форматируется один раз, а не на каждое сообщение
+        self._prefix = f"[SYSLOG] {ident}: "
+        # address (например, '/dev/log') - отправлять в настоящий syslog вместо stdout
+        self._sock = None
+        if address is not None:
+            sock = None
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.connect(address)
+            except OSError as e:
+                print(f"SyslogHandler init error: {e}", file=sys.stderr)
+                if sock is not None:
+                    sock.close()
+            else:
+                self._sock = sock
+                self._prefix = f"<14>{ident}: "  # facility user, severity info
     def handle(self, text: str) -> None:
         try:
-            print(f"[SYSLOG] {self.ident}: {text}")
+            if self._sock is not None:
+                self._sock.send((self._prefix + text).encode('utf-8'))
+            else:
+                # sys.stdout ищется при каждом вызове, чтобы работал redirect_stdout
+                write = sys.stdout.write
+                write(self._prefix)
+                write(text)
+                write('\n')
         except Exception as e:
             print(f"SyslogHandler error: {e}", file=sys.stderr)
 
@@ -84,58 +206,126 @@ class Logger:
     def __init__(self,
                  filters: List[LogFilterProtocol],
                  handlers: List[LogHandlerProtocol]):
-        self.filters = filters
-        self.handlers = handlers
+        self.filters = tuple(filters)
+        self.handlers = tuple(handlers)
+        # Заранее связанные методы, чтобы не искать атрибуты на каждом вызове log
+        filters = self._compile_fused_regex(self._fuse_simple_filters(self.filters))
+        self._filter_matches = tuple(f.match for f in filters)
+        assert all(callable(getattr(h, 'handle', None)) for h in self.handlers), \
+            "Каждый обработчик должен иметь метод handle"
+        self._handler_handles = tuple(h.handle for h in self.handlers)
+
+    @staticmethod
+    def _fuse_simple_filters(filters) -> list:
+        # Подряд идущие SimpleLogFilter объединяются в один MultiSubstringFilter
+        fused = []
+        group = []
+        for f in list(filters) + [None]:
+            if type(f) is SimpleLogFilter:
+                group.append(f)
+                continue
+            if len(group) > 1:
+                fused.append(MultiSubstringFilter([g.pattern for g in group], mode='all'))
+            else:
+                fused.extend(group)
+            group = []
+            if f is not None:
+                fused.append(f)
+        return fused
+
+    @staticmethod
+    def _compile_fused_regex(filters) -> list:
+        # ReLogFilter без групп заменяются одним FusedReLogFilter на месте первого из них.
+        # Выражения с группами не объединяются: в общем выражении сдвигаются номера групп
+        # и обратные ссылки (\1) указывают не туда.
+        # RE2 не поддерживает lookahead, поэтому с ним выражения остаются раздельными
+        if regex_engine is not re:
+            return list(filters)
+        re_filters = [f for f in filters
+                      if type(f) is ReLogFilter and f.regex is not None
+                      and f.regex.groups == 0 and f.regex.flags == re.UNICODE]
+        if len(re_filters) < 2:
+            return list(filters)
+        try:
+            fused_filter = FusedReLogFilter([f.regex.pattern for f in re_filters])
+        except re.error as e:
+            print(f"Logger regex fuse error: {e}", file=sys.stderr)
+            return list(filters)
+        fused = []
+        for f in filters:
+            if f is re_filters[0]:
+                fused.append(fused_filter)
+            elif not any(f is r for r in re_filters):
+                fused.append(f)
+        return fused
 
     def log(self, text: str) -> None:
+        # Фильтруем только если текст проходит все фильтры (AND)
+        for match in self._filter_matches:
+            if not match(text):
+                return
+        # Обработчики сами перехватывают свои ошибки, здесь - только страховка
         try:
-            # Фильтруем только если текст проходит все фильтры (AND)
-            if all(f.match(text) for f in self.filters):
-                for handler in self.handlers:
-                    try:
-                        handler.handle(text)
-                    except Exception as e:
-                        print(f"Error in handler {handler.__class__.__name__}: {e}", file=sys.stderr)
-        except Exception as e:
-            print(f"Logger error: {e}", file=sys.stderr)
+            for handle in self._handler_handles:
+                handle(text)
+        except Exception:
+            print(f"Logger error: {traceback.format_exc()}", file=sys.stderr)
 
 # --- TCP сервер для SocketHandler ---
 
-def tcp_server(host='localhost', port=9999):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((host, port))
-        s.listen()
-        print(f"Server listening on {host}:{port}")
+# Максимальный размер одного сообщения; больший заголовок считается ошибкой клиента
+MAX_FRAME_SIZE = 64 * 1024
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    print(f"Connection from {writer.get_extra_info('peername')}")
+    try:
+        # Читаем сообщения с одного соединения, пока клиент его не закроет
         while True:
-            conn, addr = s.accept()
-            print(f"Connection from {addr}")
-            with conn:
-                data = conn.recv(1024)
-                if data:
-                    print(f"Received from socket: {data.decode()}")
+            header = await reader.readexactly(4)
+            size = struct.unpack('>I', header)[0]
+            if size > MAX_FRAME_SIZE:
+                print(f"Frame too large ({size} bytes), closing connection", file=sys.stderr)
+                break
+            data = await reader.readexactly(size)
+            print(f"Received from socket: {data.decode()}")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def _serve(host: str, port: int):
+    server = await asyncio.start_server(_handle_connection, host, port)
+    print(f"Server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def tcp_server(host='localhost', port=9999):
+    # Один цикл событий обслуживает все соединения одновременно
+    asyncio.run(_serve(host, port))
 
-server_thread = threading.Thread(target=tcp_server, daemon=True)
-server_thread.start()
+if __name__ == "__main__":
+    server_thread = threading.Thread(target=tcp_server, daemon=True)
+    server_thread.start()
 
-time.sleep(1)  # Даем серверу время запуститься
+    time.sleep(1)  # Даем серверу время запуститься
 
-# --- Создаем фильтры и обработчики ---
+    # --- Создаем фильтры и обработчики ---
 
-simple_filter = SimpleLogFilter('ERROR')
-regex_filter = ReLogFilter(r'\bWARN(ING)?\b')
+    simple_filter = SimpleLogFilter('ERROR')
+    regex_filter = ReLogFilter(r'\bWARN(ING)?\b')
 
-console = ConsoleHandler()
-file_handler = FileHandler('logs.txt')
-syslog_handler = SyslogHandler('Lab3Logger')
-socket_handler = SocketHandler('localhost', 9999)
+    console = ConsoleHandler()
+    file_handler = FileHandler('logs.txt')
+    syslog_handler = SyslogHandler('Lab3Logger')
+    socket_handler = SocketHandler('localhost', 9999)
 
-logger = Logger(filters=[simple_filter, regex_filter],
-                handlers=[console, file_handler, syslog_handler, socket_handler])
+    logger = Logger(filters=[simple_filter, regex_filter],
+                    handlers=[console, file_handler, syslog_handler, socket_handler])
 
-# --- Логируем ---
+    # --- Логируем ---
 
-logger.log("INFO: This is just informational message")   # Не пройдет
-logger.log("ERROR: Something went wrong!")                # Не пройдет (не проходит второй фильтр)
-logger.log("WARNING: This might be risky!")               # Не пройдет (не проходит первый фильтр)
-logger.log("WARN: Low disk space")                         # Не пройдет (не проходит первый фильтр)
-logger.log("ERROR WARNING: Critical issue!")              # Пройдет (проходят оба фильтра)
+    logger.log("INFO: This is just informational message")   # Не пройдет
+    logger.log("ERROR: Something went wrong!")                # Не пройдет (не проходит второй фильтр)
+    logger.log("WARNING: This might be risky!")               # Не пройдет (не проходит первый фильтр)
+    logger.log("WARN: Low disk space")                         # Не пройдет (не проходит первый фильтр)
+    logger.log("ERROR WARNING: Critical issue!")              # Пройдет (проходят оба фильтра)
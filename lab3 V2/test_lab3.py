@@ -0,0 +1,27 @@
+import re
+import unittest
+
+from lab3 import FusedReLogFilter, Logger, ReLogFilter, regex_engine
+
+
+class FusedRegexTest(unittest.TestCase):
+    @unittest.skipIf(regex_engine is not re, "с RE2 выражения не объединяются")
+    def test_patterns_without_groups_are_fused(self):
+        logger = Logger([ReLogFilter(r'\bWARN\b'), ReLogFilter(r'\d+')], [])
+        self.assertEqual(len(logger._filter_matches), 1)
+        self.assertIsInstance(logger._filter_matches[0].__self__, FusedReLogFilter)
+
+    def test_backreferences_are_not_fused(self):
+        filters = [ReLogFilter(r'(a)\1'), ReLogFilter(r'(b)\1')]
+        logger = Logger(filters, [])
+        self.assertTrue(all(f.match('aa bb') for f in filters))
+        self.assertTrue(all(m('aa bb') for m in logger._filter_matches))
+        self.assertFalse(all(m('aa b') for m in logger._filter_matches))
+
+    def test_logger_with_single_filter(self):
+        logger = Logger([ReLogFilter(r'\bWARN\b')], [])
+        self.assertTrue(logger._filter_matches[0]('WARN: disk'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,29 @@
 from dataclasses import dataclass, field, asdict
 from typing import Protocol, Optional, TypeVar, Generic, Sequence
 from pathlib import Path
+from contextlib import contextmanager
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    # orjson (если установлен) быстрее и сразу отдаёт bytes
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # --- Шаг 1: Класс User ---
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class User:
     name: str
     id: int = field(compare=False)
@@ -41,57 +60,96 @@ class DataRepository(Generic[T]):
     def __init__(self, path: str, cls: type[T]):
         self.path = Path(path)
         self._cls = cls
-        self._data: list[T] = []
+        # Словарь id -> объект: O(1) поиск, порядок вставки сохраняется
+        self._data: dict[int, T] = {}
+        # Внутри batch() изменения только помечают данные как "грязные",
+        # файл перезаписывается один раз при выходе из блока
+        self._dirty = False
+        self._batch_depth = 0  # глубина вложенных batch()
         self.load()
 
     def load(self):
         try:
-            if self.path.exists() and self.path.read_text(encoding='utf-8').strip():
-                with open(self.path, 'r', encoding='utf-8') as f:
-                    raw = json.load(f)
+            if self.path.exists():
+                data = self.path.read_bytes()
+                if data.strip():
+                    raw = _json_loads(data)
                     if not isinstance(raw, list):
                         raise ValueError("Данные должны быть списком")
-                    self._data = [self._cls(**item) for item in raw]
+                    self._data = {obj.id: obj for obj in (self._cls(**item) for item in raw)}
         except (json.JSONDecodeError, OSError, ValueError) as e:
             print(f"Ошибка при загрузке данных из {self.path}: {e}")
 
     def save(self):
         try:
-            with open(self.path, 'w', encoding='utf-8') as f:
-                json.dump([obj.to_dict() for obj in self._data], f, ensure_ascii=False, indent=2)
+            self.path.write_bytes(_json_dumps([obj.to_dict() for obj in self._data.values()]))
         except OSError as e:
             print(f"Ошибка при сохранении данных в {self.path}: {e}")
 
+    def flush(self):
+        if self._dirty:
+            self.save()
+            self._dirty = False
+
+    def _auto_flush(self):
+        self._dirty = True
+        if not self._batch_depth:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
     def get_all(self) -> Sequence[T]:
-        return list(self._data)
+        return list(self._data.values())
 
     def get_by_id(self, id: int) -> Optional[T]:
-        return next((item for item in self._data if item.id == id), None)
+        return self._data.get(id)
 
     def add(self, item: T) -> None:
-        if self.get_by_id(item.id) is not None:
+        if item.id in self._data:
             raise ValueError(f"Объект с id={item.id} уже существует")
-        self._data.append(item)
-        self.save()
+        self._data[item.id] = item
+        self._auto_flush()
 
     def update(self, item: T) -> None:
-        for i, old in enumerate(self._data):
-            if old.id == item.id:
-                self._data[i] = item
-                self.save()
-                return
-        raise ValueError(f"Объект с id={item.id} не найден")
+        if item.id not in self._data:
+            raise ValueError(f"Объект с id={item.id} не найден")
+        self._data[item.id] = item
+        self._auto_flush()
 
     def delete(self, item: T) -> None:
-        initial_len = len(self._data)
-        self._data = [x for x in self._data if x.id != item.id]
-        if len(self._data) < initial_len:
-            self.save()
+        if self._data.pop(item.id, None) is not None:
+            self._auto_flush()
 
 # --- Шаг 5: Реализация UserRepository ---
 class UserRepository(UserRepositoryProtocol):
     def __init__(self, path: str):
         self._repo = DataRepository[User](path, User)
+        # Индексы по логину: login -> User и id -> login (для смены логина)
+        self._by_login: dict[str, User] = {}
+        self._login_of: dict[int, str] = {}
+        for user in self._repo.get_all():
+            self._index(user)
+
+    def _index(self, user: User) -> None:
+        old_login = self._login_of.pop(user.id, None)
+        if old_login is not None:
+            self._by_login.pop(old_login, None)
+        self._by_login[user.login] = user
+        self._login_of[user.id] = user.login
+
+    def batch(self):
+        return self._repo.batch()
+
+    def flush(self):
+        self._repo.flush()
 
     def get_all(self) -> Sequence[User]:
         return self._repo.get_all()
@@ -105,6 +163,7 @@ class UserRepository(UserRepositoryProtocol):
         if self.get_by_login(item.login) is not None:
             raise ValueError(f"Пользователь с login={item.login} уже существует")
         self._repo.add(item)
+        self._index(item)
 
     def update(self, item: User) -> None:
         # Проверка, что логин уникален (если меняется login)
@@ -112,12 +171,16 @@ class UserRepository(UserRepositoryProtocol):
         if existing_user and existing_user.id != item.id:
             raise ValueError(f"Пользователь с login={item.login} уже существует")
         self._repo.update(item)
+        self._index(item)
 
     def delete(self, item: User) -> None:
         self._repo.delete(item)
+        old_login = self._login_of.pop(item.id, None)
+        if old_login is not None:
+            self._by_login.pop(old_login, None)
 
     def get_by_login(self, login: str) -> Optional[User]:
-        return next((u for u in self._repo.get_all() if u.login == login), None)
+        return self._by_login.get(login)
 
 # --- Шаг 6: Протокол AuthService ---
 class AuthServiceProtocol(Protocol):
@@ -139,21 +202,19 @@ class AuthService(AuthServiceProtocol):
     def _load_session(self):
         try:
             if self._session_path.exists():
-                with open(self._session_path, 'r', encoding='utf-8') as f:
-                    raw = json.load(f)
-                    user_id = raw.get("user_id")
-                    if user_id is not None:
-                        user = self._user_repo.get_by_id(user_id)
-                        if user:
-                            self._current_user = user
+                raw = _json_loads(self._session_path.read_bytes())
+                user_id = raw.get("user_id")
+                if user_id is not None:
+                    user = self._user_repo.get_by_id(user_id)
+                    if user:
+                        self._current_user = user
         except (json.JSONDecodeError, OSError) as e:
             print(f"Ошибка при загрузке сессии: {e}")
 
     def _save_session(self):
         try:
             if self._current_user:
-                with open(self._session_path, 'w', encoding='utf-8') as f:
-                    json.dump({"user_id": self._current_user.id}, f, ensure_ascii=False, indent=2)
+                self._session_path.write_bytes(_json_dumps({"user_id": self._current_user.id}))
             else:
                 if self._session_path.exists():
                     self._session_path.unlink()
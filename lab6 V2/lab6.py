@@ -1,12 +1,33 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Callable, Any
+from typing import Deque, Dict, Optional, Callable, Any, Tuple
+from collections import deque
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    # orjson (если установлен) быстрее и сразу отдаёт bytes
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 # --- Состояние клавиатуры ---
 class KeyboardState:
+    __slots__ = ('output', 'cursor', 'volume', 'media_running')
+
     def __init__(self):
         self.output = ""
         self.cursor = 0
@@ -16,6 +37,8 @@ class KeyboardState:
 
 # --- Интерфейс команды ---
 class Command(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def execute(self, state: KeyboardState) -> str:
         pass
@@ -27,6 +50,8 @@ class Command(ABC):
 
 # --- Команда печати символа ---
 class PrintCharCommand(Command):
+    __slots__ = ('char', 'position')
+
     def __init__(self, char: str):
         self.char = char
         self.position = None
@@ -51,6 +76,8 @@ class PrintCharCommand(Command):
 
 # --- Команда увеличения громкости ---
 class VolumeUpCommand(Command):
+    __slots__ = ()
+
     def execute(self, state: KeyboardState) -> str:
         state.volume = min(100, state.volume + 20)
         return f"volume increased +20% (current: {state.volume}%)"
@@ -62,6 +89,8 @@ class VolumeUpCommand(Command):
 
 # --- Команда уменьшения громкости ---
 class VolumeDownCommand(Command):
+    __slots__ = ()
+
     def execute(self, state: KeyboardState) -> str:
         state.volume = max(0, state.volume - 20)
         return f"volume decreased -20% (current: {state.volume}%)"
@@ -73,6 +102,8 @@ class VolumeDownCommand(Command):
 
 # --- Команда медиа-плеера ---
 class MediaPlayerCommand(Command):
+    __slots__ = ('was_running',)
+
     def __init__(self):
         self.was_running = False
 
@@ -96,13 +127,11 @@ class KeyboardStateSaver:
         self.filepath = Path(filepath)
 
     def save(self, associations: Dict[str, Dict[str, Any]]):
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(associations, f, ensure_ascii=False, indent=2)
+        self.filepath.write_bytes(_json_dumps(associations))
 
     def load(self) -> Dict[str, Dict[str, Any]]:
         if self.filepath.exists():
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _json_loads(self.filepath.read_bytes())
         return {}
 
 
@@ -114,13 +143,16 @@ class CommandFactory:
     def register(self, name: str, constructor: Callable[[Any], Command]):
         self.registry[name] = constructor
 
-    def create(self, desc: Dict[str, Any]) -> Command:
+    def resolve(self, desc: Dict[str, Any]) -> Tuple[Callable[[Any], Command], Any]:
         cmd_name = desc["command"]
-        arg = desc.get("arg")
         if cmd_name in self.registry:
-            return self.registry[cmd_name](arg)
+            return self.registry[cmd_name], desc.get("arg")
         raise ValueError(f"Unknown command: {cmd_name}")
 
+    def create(self, desc: Dict[str, Any]) -> Command:
+        constructor, arg = self.resolve(desc)
+        return constructor(arg)
+
 
 # --- Класс клавиатуры ---
 class Keyboard:
@@ -129,44 +161,69 @@ class Keyboard:
         assoc_file: str,
         command_factory: CommandFactory,
         log_file: Optional[str] = None,
+        history_limit: int = 1024,
     ):
         self.state = KeyboardState()
         self.state_saver = KeyboardStateSaver(assoc_file)
         self.associations: Dict[str, Dict[str, Any]] = self.state_saver.load()
 
-        self.undo_stack: List[Command] = []
-        self.redo_stack: List[Command] = []
+        # Ограниченная история: самые старые команды вытесняются автоматически
+        self.undo_stack: Deque[Command] = deque(maxlen=history_limit)
+        self.redo_stack: Deque[Command] = deque(maxlen=history_limit)
+        self._undo_push = self.undo_stack.append
+        self._undo_pop = self.undo_stack.pop
+        self._redo_push = self.redo_stack.append
+        self._redo_pop = self.redo_stack.pop
 
         self.factory = command_factory
 
-        self.log_f = open(log_file, 'a', encoding='utf-8') if log_file else None
+        # Конструктор и аргумент команды по клавишам: при нажатии не нужен разбор desc
+        self._compiled: Dict[str, Tuple[Callable[[Any], Command], Any]] = {}
+        for key, desc in self.associations.items():
+            self._compile(key, desc)
+
+        # buffering=1: строчная буферизация, буфер сбрасывается на каждом '\n'
+        self.log_f = open(log_file, 'a', buffering=1, encoding='utf-8') if log_file else None
 
     def log(self, text: str):
         print(text)
         if self.log_f:
             self.log_f.write(text + "\n")
-            self.log_f.flush()
+
+    def _compile(self, key: str, desc: Dict[str, Any]):
+        try:
+            self._compiled[key] = self.factory.resolve(desc)
+        except ValueError:
+            # Ошибка будет выведена при нажатии клавиши
+            self._compiled.pop(key, None)
 
     def set_association_desc(self, key: str, desc: Dict[str, Any]):
         self.associations[key] = desc
+        self._compile(key, desc)
         self.state_saver.save(self.associations)
         self.log(f"set: {key} -> {desc}")
 
     def press_key(self, key: str):
-        desc = self.associations.get(key)
-        if not desc:
-            self.log(f"unknown key: {key}")
-            return
-
-        try:
-            command = self.factory.create(desc)
-        except ValueError as e:
-            self.log(f"error: {e}")
-            return
-
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            desc = self.associations.get(key)
+            if not desc:
+                self.log(f"unknown key: {key}")
+                return
+
+            try:
+                compiled = self.factory.resolve(desc)
+            except ValueError as e:
+                self.log(f"error: {e}")
+                return
+            self._compiled[key] = compiled
+
+        # Команды хранят своё состояние (position, was_running), поэтому каждый раз новая
+        constructor, arg = compiled
+        command = constructor(arg)
         result = command.execute(self.state)
 
-        self.undo_stack.append(command)
+        self._undo_push(command)
         self.redo_stack.clear()
 
         self.log(key)
@@ -177,9 +234,9 @@ class Keyboard:
             self.log("undo")
             self.log("nothing to undo")
             return
-        command = self.undo_stack.pop()
+        command = self._undo_pop()
         result = command.undo(self.state)
-        self.redo_stack.append(command)
+        self._redo_push(command)
         self.log("undo")
         self.log(result)
 
@@ -188,9 +245,9 @@ class Keyboard:
             self.log("redo")
             self.log("nothing to redo")
             return
-        command = self.redo_stack.pop()
+        command = self._redo_pop()
         result = command.execute(self.state)
-        self.undo_stack.append(command)
+        self._undo_push(command)
         self.log("redo")
         self.log(result)
 